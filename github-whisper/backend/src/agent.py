@@ -1,9 +1,16 @@
 import os
-import json
+import re
+import asyncio
+import logging
+import functools
 from typing import Any, Optional, Annotated
 from dataclasses import dataclass
 
+import anyio
+import httpx
+import orjson
 from dotenv import load_dotenv
+from openai import DefaultAsyncHttpxClient
 
 from langchain_core.messages import (
     BaseMessage,
@@ -11,23 +18,42 @@ from langchain_core.messages import (
     AIMessage,
     SystemMessage,
     ToolMessage,
+    RemoveMessage,
 )
+from langchain_core.tools import BaseTool, ToolException
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
 
 # MCP Adapters for GitHub
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from .checkpointer import LatestCheckpointMemorySaver
+from .llm_cache import TTLCache, make_cache_key
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ----------------------------------------------------------------------
 # Constants
 # ----------------------------------------------------------------------
 
 GITHUB_MCP_URL = "https://api.githubcopilot.com/mcp/"
-TOOL_OUTPUT_MAX_CHARS = 200_000
+# ~6k tokens; large tool outputs (file contents, PR diffs) are cut to head + tail
+TOOL_OUTPUT_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_MAX_CHARS", "24000"))
+TOOL_OUTPUT_HEAD_RATIO = 0.6
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "8"))
+# Max messages kept per thread in the checkpointer (0 disables trimming)
+CHECKPOINT_MAX_MESSAGES = int(os.getenv("CHECKPOINT_MAX_MESSAGES", "40"))
+EXTRACTOR_CACHE_ENABLED = os.getenv("EXTRACTOR_CACHE_ENABLED", "true").lower() not in (
+    "0",
+    "false",
+    "no",
+)
 
 # ----------------------------------------------------------------------
 # State Field Registry (Single Source of Truth)
@@ -69,6 +95,111 @@ STATE_FIELDS = {
     },
 }
 
+STATE_KEYS: tuple[str, ...] = tuple(STATE_FIELDS)
+
+# Every hint keyword across STATE_FIELDS, lowercased once at import
+STATE_HINTS: frozenset[str] = frozenset(
+    hint.lower() for meta in STATE_FIELDS.values() for hint in meta["hints"]
+)
+
+# Command verbs that set context without naming a field ("use facebook/react",
+# "Switch to feature/login"); matched as whole words, so "user" doesn't count
+STATE_HINT_VERBS: tuple[str, ...] = ("use", "switch", "clear")
+
+# Values that set context with no keyword at all, e.g. a bare answer to
+# "which repository?": an owner/repo token or a github.com URL
+STATE_HINT_VALUE_PATTERNS: tuple[str, ...] = (r"github\.com/", r"[\w.-]+/[\w.-]+")
+
+# All hints, verbs and values in one alternation, so a message is scanned once
+# by the regex engine instead of once per hint (hints longest first, as substrings)
+STATE_HINT_PATTERN = re.compile(
+    "|".join([
+        *(re.escape(h) for h in sorted(STATE_HINTS, key=len, reverse=True)),
+        *(rf"\b{re.escape(v)}\b" for v in STATE_HINT_VERBS),
+        *STATE_HINT_VALUE_PATTERNS,
+    ]),
+    re.IGNORECASE,
+)
+
+
+# ----------------------------------------------------------------------
+# State Command Patterns
+# ----------------------------------------------------------------------
+
+# Messages that are nothing but an explicit context command are parsed
+# directly, without a state-extractor LLM call. Each pattern must match the
+# whole message and capture the new value in group 1. Only unambiguous verb
+# forms belong here ("branch protection" or "org is growing" are ordinary
+# messages); everything else goes to the extractor.
+STATE_COMMAND_PATTERNS: list[tuple[str, re.Pattern]] = [
+    (
+        "activeOrg",
+        re.compile(
+            r"(?:use|switch\s+to)\s+(?:the\s+)?(?:org|organization)\s+"
+            r"([A-Za-z0-9_.-]+?)[.!]?",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "activeRepo",
+        re.compile(
+            r"(?:(?:use|switch\s+to)\s+(?:the\s+)?(?:repo|repository)|(?:repo|repository)\s+is)\s+"
+            r"(?:https?://github\.com/)?([A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+?)(?:\.git)?/?[.!]?",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "activeBranch",
+        re.compile(
+            r"(?:use|switch\s+to)\s+(?:the\s+)?branch\s+"
+            r"([A-Za-z0-9_./-]+?)[.!]?",
+            re.IGNORECASE,
+        ),
+    ),
+]
+
+# "clear org" / "clear the repository" / ... resets the named key to null
+STATE_CLEAR_WORDS = {
+    "org": "activeOrg",
+    "organization": "activeOrg",
+    "repo": "activeRepo",
+    "repository": "activeRepo",
+    "branch": "activeBranch",
+}
+STATE_CLEAR_PATTERN = re.compile(
+    rf"clear\s+(?:the\s+)?({'|'.join(STATE_CLEAR_WORDS)})[.!]?",
+    re.IGNORECASE,
+)
+
+
+# ----------------------------------------------------------------------
+# State Update Tool
+# ----------------------------------------------------------------------
+
+STATE_UPDATE_TOOL_NAME = "report_state_update"
+
+
+def build_state_update_tool() -> dict:
+    """Build the OpenAI function schema the state extractor must call."""
+    return {
+        "type": "function",
+        "function": {
+            "name": STATE_UPDATE_TOOL_NAME,
+            "description": (
+                "Report context values the user explicitly set or cleared. "
+                "Omit keys that did not change; use null to clear a key."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    k: {"type": ["string", "null"], "description": meta["description"]}
+                    for k, meta in STATE_FIELDS.items()
+                },
+                "additionalProperties": False,
+            },
+        },
+    }
+
 
 # ----------------------------------------------------------------------
 # Type Definitions
@@ -104,6 +235,14 @@ def require_env(name: str) -> str:
 
 def content_to_string(content: Any) -> str:
     """Convert message content to string."""
+    # Fast path: OpenAI message content is almost always a plain str
+    if content.__class__ is str:
+        return content
+    return content_blocks_to_string(content)
+
+
+def content_blocks_to_string(content: Any) -> str:
+    """Convert non-str message content (block lists, dicts, str subclasses) to string."""
     if isinstance(content, str):
         return content
     if isinstance(content, list):
@@ -113,17 +252,9 @@ def content_to_string(content: Any) -> str:
     return ""
 
 
-def safe_json_parse(text: str) -> Optional[dict]:
-    """Safely parse JSON, return None on failure."""
-    try:
-        return json.loads(text)
-    except (json.JSONDecodeError, TypeError):
-        return None
-
-
-def get_state_keys() -> list[str]:
-    """Get list of state field keys."""
-    return list(STATE_FIELDS.keys())
+def has_state_hint(text: str) -> bool:
+    """Check whether text mentions any state hint keyword (e.g. org, repo, branch)."""
+    return STATE_HINT_PATTERN.search(text) is not None
 
 
 def get_last_user_text(messages: list[BaseMessage]) -> str:
@@ -137,34 +268,84 @@ def get_last_user_text(messages: list[BaseMessage]) -> str:
 def get_tool_calls_from_ai_message(message: AIMessage) -> list[dict]:
     """Extract tool calls from an AI message."""
     # Try direct tool_calls attribute
-    if hasattr(message, "tool_calls") and message.tool_calls:
-        return message.tool_calls
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return tool_calls
 
     # Try additional_kwargs
-    if hasattr(message, "additional_kwargs"):
-        tool_calls = message.additional_kwargs.get("tool_calls", [])
-        if tool_calls:
-            return tool_calls
+    additional_kwargs = getattr(message, "additional_kwargs", None)
+    if additional_kwargs:
+        return additional_kwargs.get("tool_calls") or []
 
     return []
 
 
+def get_trimmed_message_ids(messages: list[BaseMessage], max_messages: int) -> list[str]:
+    """
+    Get ids of the oldest messages to drop once more than max_messages exist.
+
+    Trimming cuts down to about max_messages // 2 in one batch, so the
+    history prefix (and the provider's cached prompt prefix) changes only
+    once every few turns instead of on every turn. The kept window always
+    starts at a HumanMessage, so an assistant tool call is never separated
+    from its ToolMessages, and the current turn is never dropped.
+    """
+    if max_messages <= 0 or len(messages) <= max_messages:
+        return []
+
+    keep = max(max_messages // 2, 1)
+    start = None
+    last_human = None
+    for i, m in enumerate(messages):
+        if isinstance(m, HumanMessage):
+            last_human = i
+            if i >= len(messages) - keep:
+                start = i
+                break
+
+    if start is None:
+        start = last_human
+    if not start:
+        return []
+
+    return [m.id for m in messages[:start] if m.id]
+
+
 def truncate_text(text: str, max_chars: int) -> str:
-    """Truncate text to max characters with indicator."""
-    if len(text) <= max_chars:
+    """Truncate text to max characters, keeping the head and tail with an indicator."""
+    length = len(text)
+    if length <= max_chars:
         return text
-    return f"{text[:max_chars]}\n...[truncated {len(text) - max_chars} chars]"
+    head = int(max_chars * TOOL_OUTPUT_HEAD_RATIO)
+    tail = max_chars - head
+    return (
+        f"{text[:head]}\n...[truncated {length - max_chars} chars]...\n"
+        f"{text[length - tail:]}"
+    )
+
+
+def fast_parse_state_command(text: str) -> Optional[dict[str, Optional[str]]]:
+    """Parse an explicit context command without the LLM, or return None."""
+    text = text.strip()
+
+    m = STATE_CLEAR_PATTERN.fullmatch(text)
+    if m:
+        return {STATE_CLEAR_WORDS[m.group(1).lower()]: None}
+
+    for key, pattern in STATE_COMMAND_PATTERNS:
+        m = pattern.fullmatch(text)
+        if m:
+            return {key: m.group(1)}
+    return None
 
 
 def parse_state_update(raw: Any) -> dict[str, Optional[str]]:
     """Parse state update from raw object."""
     upd = {}
-    keys = get_state_keys()
-
     if not isinstance(raw, dict):
         return upd
 
-    for k in keys:
+    for k in STATE_KEYS:
         if k in raw:
             v = raw[k]
             if isinstance(v, str) or v is None:
@@ -176,9 +357,7 @@ def parse_state_update(raw: Any) -> dict[str, Optional[str]]:
 def apply_state_update(upd: dict[str, Optional[str]]) -> dict[str, Any]:
     """Apply state update, converting null to removal."""
     out = {}
-    keys = get_state_keys()
-
-    for k in keys:
+    for k in STATE_KEYS:
         if k not in upd:
             continue
         v = upd[k]
@@ -198,7 +377,7 @@ def build_allowed_keys_prompt_section() -> str:
     """Build prompt section describing allowed state keys."""
     lines = ["Allowed state keys (ONLY these; values must be string or null):"]
 
-    for k in get_state_keys():
+    for k in STATE_KEYS:
         meta = STATE_FIELDS[k]
         lines.append(f"- {meta['name']}: {meta['description']}")
 
@@ -209,7 +388,7 @@ def build_examples_prompt_section() -> str:
     """Build prompt section with examples."""
     lines = ["Examples of user messages that SHOULD update state:"]
 
-    for k in get_state_keys():
+    for k in STATE_KEYS:
         meta = STATE_FIELDS[k]
         lines.append(f"- {meta['name']} examples:")
         for ex in meta["examples"]:
@@ -218,73 +397,50 @@ def build_examples_prompt_section() -> str:
     return "\n".join(lines)
 
 
-def build_state_extractor_prompt(current_state: dict[str, str], user_text: str) -> str:
-    """Build the prompt for state extraction."""
-    allowed_keys = build_allowed_keys_prompt_section()
-    examples = build_examples_prompt_section()
-
-    state_lines = []
-    for k in get_state_keys():
-        v = current_state.get(k, "(none)")
-        state_lines.append(f'{k}="{v}"')
-
+def build_state_extractor_instructions() -> str:
+    """Build the static instructions part of the state extraction prompt."""
     return "\n".join([
-        "You extract state updates from the latest USER message.",
-        "Return JSON ONLY (no markdown, no commentary).",
+        "You extract state updates from the USER message that follows.",
+        f"Report them by calling {STATE_UPDATE_TOOL_NAME}.",
         "",
-        allowed_keys,
+        ALLOWED_KEYS_PROMPT_SECTION,
         "",
         "Rules:",
-        "- Output a JSON object (possibly empty).",
+        "- Call the function with an object (possibly empty).",
         "- Only include keys from the allowed list.",
         "- Only set a key if the user explicitly provided that value to set/change context.",
         "- If the user explicitly wants to clear a value, set that key to null.",
-        "- If the user is asking a question, discussing a topic, or NOT providing context values, return {}.",
-        "",
-        examples,
-        "",
-        "Current state:",
-        ", ".join(state_lines),
+        "- If the user is asking a question, discussing a topic, or NOT providing context values, pass {}.",
         "",
-        "User message:",
-        user_text,
+        EXAMPLES_PROMPT_SECTION,
     ])
 
 
-def build_state_repair_prompt(raw_text: str) -> str:
-    """Build prompt for repairing invalid JSON."""
-    allowed_keys = build_allowed_keys_prompt_section()
+def build_state_extractor_prompt(current_state: dict[str, str]) -> str:
+    """
+    Build the system prompt for state extraction.
 
-    return "\n".join([
-        "You are a JSON repair utility.",
-        "Convert the given content into a JSON object that only contains allowed state keys.",
-        "Output JSON ONLY.",
-        "",
-        allowed_keys,
-        "",
-        "Rules:",
-        "- Output an object (possibly empty).",
-        "- Values must be string or null.",
-        "- Do not include any other keys.",
-        "",
-        "Content:",
-        raw_text,
-    ])
+    The user message is sent separately as a trailing HumanMessage so the
+    static instructions form a stable, cacheable prompt prefix.
+    """
+    state_lines = []
+    for k in STATE_KEYS:
+        v = current_state.get(k, "(none)")
+        state_lines.append(f'{k}="{v}"')
 
+    return f"{STATE_EXTRACTOR_INSTRUCTIONS}\n\nCurrent state:\n{', '.join(state_lines)}"
 
-def build_agent_system_prompt(state: dict) -> str:
-    """Build the main agent system prompt."""
-    keys = get_state_keys()
 
-    ctx_parts = []
-    for k in keys:
-        v = state.get(k, "(none)")
-        if v is None:
-            v = "(none)"
-        ctx_parts.append(f"{k}={v}")
+def build_agent_system_prompt() -> str:
+    """
+    Build the main agent system prompt.
 
+    The prompt is static so it (together with the bound tools) forms an
+    identical prefix on every call; the current context is sent separately
+    by build_agent_context_prompt, after the conversation history.
+    """
     no_ask_lines = []
-    for k in keys:
+    for k in STATE_KEYS:
         no_ask_lines.append(
             f"- If {k} is set, do not ask for it again unless the user asks to change/clear it."
         )
@@ -300,11 +456,150 @@ def build_agent_system_prompt(state: dict) -> str:
         "",
         "Context usage rules:",
         *no_ask_lines,
-        "",
-        f"Current context: {' '.join(ctx_parts)}",
+        "- The current context is given in the last system message.",
     ])
 
 
+def build_agent_context_prompt(state: dict) -> str:
+    """Build the dynamic context message appended after the conversation."""
+    return format_agent_context(tuple(state.get(k) for k in STATE_KEYS))
+
+
+@functools.lru_cache(maxsize=128)
+def format_agent_context(values: tuple[Optional[str], ...]) -> str:
+    """Format the context line for one combination of state values (memoized)."""
+    ctx_parts = []
+    for k, v in zip(STATE_KEYS, values, strict=True):
+        if v is None:
+            v = "(none)"
+        ctx_parts.append(f"{k}={v}")
+
+    return f"Current context: {' '.join(ctx_parts)}"
+
+
+# ----------------------------------------------------------------------
+# Precomputed Prompts
+# ----------------------------------------------------------------------
+
+# STATE_FIELDS never changes after import, so the static prompt text is
+# built once and stays byte-identical across calls
+ALLOWED_KEYS_PROMPT_SECTION = build_allowed_keys_prompt_section()
+EXAMPLES_PROMPT_SECTION = build_examples_prompt_section()
+STATE_EXTRACTOR_INSTRUCTIONS = build_state_extractor_instructions()
+AGENT_SYSTEM_PROMPT = build_agent_system_prompt()
+
+
+# ----------------------------------------------------------------------
+# MCP Session
+# ----------------------------------------------------------------------
+
+# McpError codes meaning the session itself is gone: the client session's
+# "Connection closed", and streamable HTTP's "Session terminated" (HTTP 404)
+MCP_SESSION_LOST_CODES = frozenset({CONNECTION_CLOSED, 32600})
+MCP_TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, httpx.TransportError)
+
+
+def is_mcp_session_lost(err: BaseException) -> bool:
+    """Check whether an error means the MCP session or its transport is gone."""
+    if isinstance(err, MCP_TRANSPORT_ERRORS):
+        return True
+    return isinstance(err, McpError) and err.error.code in MCP_SESSION_LOST_CODES
+
+
+class MCPToolSession:
+    """
+    One long-lived MCP session whose tools are reloaded after a disconnect.
+
+    Each session is opened and closed inside its own owner task, so the
+    transport's task group is always exited by the task that entered it,
+    whichever task later triggers a reconnect or close.
+    """
+
+    def __init__(self, client: MultiServerMCPClient, server_name: str):
+        self._client = client
+        self._server_name = server_name
+        self._lock = asyncio.Lock()
+        self._generation = 0
+        self._owner: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self.tools: list[BaseTool] = []
+        self._ainvoke_by_name: dict[str, Any] = {}
+
+    async def _own_session(self, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        """Hold the session open until stop is set (runs as the owner task)."""
+        try:
+            async with self._client.session(self._server_name) as session:
+                ready.set_result(await load_mcp_tools(session))
+                await stop.wait()
+        except Exception as err:
+            if not ready.done():
+                ready.set_exception(err)
+            else:
+                logger.warning("MCP session %s closed with error: %s", self._server_name, err)
+
+    async def connect(self) -> list[BaseTool]:
+        """Open a new session and load its tools (bound to that session)."""
+        ready = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+        owner = asyncio.create_task(self._own_session(ready, stop))
+        try:
+            raw_tools = await ready
+        except BaseException:
+            stop.set()
+            await asyncio.gather(owner, return_exceptions=True)
+            raise
+
+        self._owner, self._stop = owner, stop
+        self.tools = [t for t in raw_tools if hasattr(t, "name") and hasattr(t, "invoke")]
+        # Pre-bound ainvoke per tool name: one dict lookup per tool call
+        self._ainvoke_by_name = {t.name: t.ainvoke for t in self.tools}
+        self._generation += 1
+        return self.tools
+
+    async def aclose(self) -> None:
+        """Close the current session, if any."""
+        owner, stop = self._owner, self._stop
+        self._owner = self._stop = None
+        if owner is not None:
+            stop.set()
+            await asyncio.gather(owner, return_exceptions=True)
+
+    async def reconnect(self, generation: int) -> None:
+        """Replace the session, unless another caller already did since generation."""
+        async with self._lock:
+            if generation != self._generation:
+                return
+            await self.aclose()
+            await self.connect()
+            logger.info("Reconnected MCP session %s", self._server_name)
+
+    def has_tool(self, name: str) -> bool:
+        return name in self._ainvoke_by_name
+
+    async def ainvoke(self, name: str, args: dict) -> Any:
+        """
+        Call a tool, reconnecting once if the session or transport was lost.
+
+        Any other error (tool errors, JSON-RPC error replies, invalid input)
+        is raised as-is. Tools are read-only, so retrying the call on the new
+        session is safe.
+        """
+        generation = self._generation
+        try:
+            return await self._ainvoke_by_name[name](args)
+        except Exception as err:
+            if not is_mcp_session_lost(err):
+                raise
+            logger.warning("MCP session lost during %s (%s), reconnecting", name, err)
+
+        await self.reconnect(generation)
+
+        ainvoke = self._ainvoke_by_name.get(name)
+        if ainvoke is None:
+            raise ToolException(f"Tool no longer available after reconnecting: {name}")
+        return await ainvoke(args)
+
+
 # ----------------------------------------------------------------------
 # Agent Factory
 # ----------------------------------------------------------------------
@@ -333,38 +628,54 @@ async def create_agent() -> AgentHandle:
         },
     })
 
-    # Get tools from MCP
-    raw_tools = await mcp.get_tools()
-    tools = [t for t in raw_tools if hasattr(t, "name") and hasattr(t, "invoke")]
+    # Keep a single MCP session open for the agent's lifetime so tool calls
+    # don't pay an HTTP connect + initialize handshake each time; it is
+    # re-opened if the remote session expires or the connection drops
+    mcp_session = MCPToolSession(mcp, "github")
+    tools = await mcp_session.connect()
+
+    if not tools:
+        await mcp_session.aclose()
+        raise ValueError(f"No tools available from GitHub MCP server: {GITHUB_MCP_URL}")
 
-    tool_by_name = {t.name: t for t in tools}
+    logger.info("Loaded %d GitHub MCP tools", len(tools))
+
+    # Caps concurrent calls to the MCP server when a turn requests many tools
+    tool_semaphore = asyncio.Semaphore(TOOL_CONCURRENCY)
 
     # ---------------- LLM (Native Tool Calling) ----------------
 
+    # One connection pool to the OpenAI API, shared by every model below
+    openai_http_client = DefaultAsyncHttpxClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+    )
+
     llm = ChatOpenAI(
         model="gpt-4.1-mini",
         temperature=0.2,
+        http_async_client=openai_http_client,
     )
 
     llm_with_tools = llm.bind_tools(tools)
 
-    # ---------------- State Extractor (JSON Mode) ----------------
+    # ---------------- State Extractor (Forced Function Call) ----------------
 
-    try:
-        state_extractor = ChatOpenAI(
-            model="gpt-4.1-mini",
-            temperature=0,
-            model_kwargs={"response_format": {"type": "json_object"}},
-        )
-    except Exception:
-        state_extractor = ChatOpenAI(
-            model="gpt-4.1-mini",
-            temperature=0,
-        )
+    state_extractor = ChatOpenAI(
+        model="gpt-4.1-mini",
+        temperature=0,
+        http_async_client=openai_http_client,
+    ).bind_tools([build_state_update_tool()], tool_choice=STATE_UPDATE_TOOL_NAME)
+
+    # ---------------- State Extractor Cache ----------------
+
+    # The extractor runs at temperature 0, so its result for a given
+    # (message, current state) pair is reused instead of re-running 1-3 calls
+    extractor_cache = TTLCache()
 
     # ---------------- Memory ----------------
 
-    checkpointer = MemorySaver()
+    checkpointer = LatestCheckpointMemorySaver()
 
     # ---------------- LangGraph State Schema ----------------
 
@@ -379,6 +690,14 @@ async def create_agent() -> AgentHandle:
 
     # ---------------- Nodes ----------------
 
+    async def trim_history_node(state: GraphState) -> dict:
+        """Drop the oldest turns in a batch once the thread exceeds CHECKPOINT_MAX_MESSAGES."""
+        ids = get_trimmed_message_ids(state["messages"], CHECKPOINT_MAX_MESSAGES)
+        if not ids:
+            return {}
+
+        return {"messages": [RemoveMessage(id=i) for i in ids]}
+
     async def pre_extract_state_node(state: GraphState) -> dict:
         """Pre-extract state updates from user message before agent runs."""
         user_text = get_last_user_text(state["messages"])
@@ -386,49 +705,40 @@ async def create_agent() -> AgentHandle:
         if not user_text or not user_text.strip():
             return {}
 
+        fast_upd = fast_parse_state_command(user_text)
+        if fast_upd:
+            return apply_state_update(fast_upd)
+
+        # Messages that mention no org/repo/branch hint can't set context
+        if not has_state_hint(user_text):
+            return {}
+
         current_state = {}
-        for k in get_state_keys():
+        for k in STATE_KEYS:
             v = state.get(k)
             if isinstance(v, str):
                 current_state[k] = v
 
-        system_text = build_state_extractor_prompt(current_state, user_text)
+        cache_key = None
+        if EXTRACTOR_CACHE_ENABLED:
+            cache_key = make_cache_key([user_text, current_state])
+            cached = extractor_cache.get(cache_key)
+            if cached is not None:
+                return apply_state_update(cached)
 
-        upd = None
-        raw_text = ""
+        system_text = build_state_extractor_prompt(current_state)
+        user_message = HumanMessage(content=user_text)
 
-        # Attempt 1
-        resp = await state_extractor.ainvoke([SystemMessage(content=system_text)])
-        raw_text = content_to_string(resp.content)
-        parsed = safe_json_parse(raw_text)
+        resp = await state_extractor.ainvoke([SystemMessage(content=system_text), user_message])
 
-        if parsed:
-            upd = parse_state_update(parsed)
+        upd = {}
+        for call in get_tool_calls_from_ai_message(resp):
+            if call.get("name") == STATE_UPDATE_TOOL_NAME:
+                upd = parse_state_update(call.get("args"))
+                break
 
-        # Attempt 2 (retry)
-        if not upd:
-            retry_prompt = "\n".join([
-                system_text,
-                "",
-                "IMPORTANT: Your previous output was invalid. Output JSON object only with allowed keys.",
-            ])
-
-            resp = await state_extractor.ainvoke([SystemMessage(content=retry_prompt)])
-            raw_text = content_to_string(resp.content)
-            parsed = safe_json_parse(raw_text)
-
-            if parsed:
-                upd = parse_state_update(parsed)
-
-        # Attempt 3 (repair)
-        if not upd:
-            repair_prompt = build_state_repair_prompt(raw_text)
-            resp = await state_extractor.ainvoke([SystemMessage(content=repair_prompt)])
-            repaired_text = content_to_string(resp.content)
-            parsed = safe_json_parse(repaired_text)
-
-            if parsed:
-                upd = parse_state_update(parsed)
+        if EXTRACTOR_CACHE_ENABLED:
+            extractor_cache.set(cache_key, upd)
 
         if not upd:
             return {}
@@ -437,13 +747,56 @@ async def create_agent() -> AgentHandle:
 
     async def agent_node(state: GraphState) -> dict:
         """Main agent reasoning node."""
-        system_text = build_agent_system_prompt(state)
-        system = SystemMessage(content=system_text)
+        system = SystemMessage(content=AGENT_SYSTEM_PROMPT)
+        context = SystemMessage(content=build_agent_context_prompt(state))
 
-        response = await llm_with_tools.ainvoke([system, *state["messages"]])
+        # Static prompt + history first, dynamic context last, so a context
+        # change doesn't invalidate the provider's cached prompt prefix
+        response = await llm_with_tools.ainvoke([system, *state["messages"], context])
 
         return {"messages": [response]}
 
+    async def run_tool_call(call: dict) -> tuple[ToolMessage, bool]:
+        """
+        Execute a single tool call.
+
+        Returns:
+            The resulting ToolMessage and whether the tool rejected its input
+            as not matching the expected schema.
+        """
+        tool_name = call.get("name", "")
+        tool_call_id = call.get("id", "tool")
+
+        if not mcp_session.has_tool(tool_name):
+            message = ToolMessage(
+                content=f"Tool not found: {tool_name}",
+                tool_call_id=tool_call_id,
+            )
+            return message, False
+
+        try:
+            async with tool_semaphore:
+                result = await mcp_session.ainvoke(tool_name, call.get("args", {}))
+            if isinstance(result, str):
+                raw = result
+            else:
+                raw = orjson.dumps(result, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+            content = truncate_text(raw, TOOL_OUTPUT_MAX_CHARS)
+
+            message = ToolMessage(
+                content=content,
+                tool_call_id=tool_call_id,
+            )
+            return message, False
+        except Exception as err:
+            msg = str(err)
+
+            message = ToolMessage(
+                content=f"Tool '{tool_name}' failed: {msg}",
+                tool_call_id=tool_call_id,
+            )
+            return message, "Received tool input did not match expected schema" in msg
+
     async def tools_node(state: GraphState) -> dict:
         """Tool execution node."""
         messages = state["messages"]
@@ -458,45 +811,11 @@ async def create_agent() -> AgentHandle:
         if not tool_calls:
             return {}
 
-        tool_messages = []
-        saw_schema_mismatch = False
-
-        for call in tool_calls:
-            tool_name = call.get("name", "")
-            tool = tool_by_name.get(tool_name)
-
-            if not tool:
-                tool_messages.append(
-                    ToolMessage(
-                        content=f"Tool not found: {tool_name}",
-                        tool_call_id=call.get("id", "tool"),
-                    )
-                )
-                continue
-
-            try:
-                result = await tool.ainvoke(call.get("args", {}))
-                raw = result if isinstance(result, str) else json.dumps(result)
-                content = truncate_text(raw, TOOL_OUTPUT_MAX_CHARS)
-
-                tool_messages.append(
-                    ToolMessage(
-                        content=content,
-                        tool_call_id=call.get("id", "tool"),
-                    )
-                )
-            except Exception as err:
-                msg = str(err)
-
-                if "Received tool input did not match expected schema" in msg:
-                    saw_schema_mismatch = True
-
-                tool_messages.append(
-                    ToolMessage(
-                        content=f"Tool '{tool_name}' failed: {msg}",
-                        tool_call_id=call.get("id", "tool"),
-                    )
-                )
+        # Independent tool calls run concurrently; gather keeps call order
+        results = await asyncio.gather(*(run_tool_call(call) for call in tool_calls))
+
+        tool_messages = [message for message, _ in results]
+        saw_schema_mismatch = any(mismatch for _, mismatch in results)
 
         next_retry = state.get("toolRetryCount", 0)
 
@@ -539,12 +858,14 @@ async def create_agent() -> AgentHandle:
 
     workflow = StateGraph(GraphState)
 
+    workflow.add_node("trim", trim_history_node)
     workflow.add_node("pre_extract", pre_extract_state_node)
     workflow.add_node("agent", agent_node)
     workflow.add_node("tools", tools_node)
     workflow.add_node("end", end_node)
 
-    workflow.add_edge(START, "pre_extract")
+    workflow.add_edge(START, "trim")
+    workflow.add_edge("trim", "pre_extract")
     workflow.add_edge("pre_extract", "agent")
     workflow.add_conditional_edges("agent", route_after_agent, ["tools", "end"])
     workflow.add_conditional_edges("tools", route_after_tools, ["agent"])
@@ -553,10 +874,14 @@ async def create_agent() -> AgentHandle:
     agent = workflow.compile(checkpointer=checkpointer)
 
     async def close():
-        """Close MCP connection."""
+        """Close MCP connection and the shared OpenAI HTTP client."""
+        try:
+            await mcp_session.aclose()
+        except Exception:
+            pass
+
         try:
-            if hasattr(mcp, "close"):
-                await mcp.close()
+            await openai_http_client.aclose()
         except Exception:
             pass
 
@@ -0,0 +1,65 @@
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+
+# ----------------------------------------------------------------------
+# Latest-Only In-Memory Checkpointer
+# ----------------------------------------------------------------------
+
+
+class LatestCheckpointMemorySaver(MemorySaver):
+    """
+    MemorySaver that keeps only the latest checkpoint of each thread.
+
+    The stock saver stores every checkpoint, its pending writes and every
+    channel-version blob forever, so each superstep adds another copy of the
+    messages list. Here older checkpoints and superseded blobs are dropped
+    on every put, which keeps per-thread memory proportional to the current
+    state (time travel over old checkpoints is not needed by this app).
+
+    Channels must store full values, as the add_messages reducer does; a
+    DeltaChannel replays ancestor writes and needs the history dropped here.
+    This relies on MemorySaver's storage layout, which
+    tests/test_checkpointer.py pins down.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # (thread_id, checkpoint_ns) -> {channel: latest stored version}
+        self._latest_versions: dict[tuple[str, str], dict[str, Any]] = {}
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Any,
+        metadata: Any,
+        new_versions: Any,
+    ) -> RunnableConfig:
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+
+        configurable = next_config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable["checkpoint_id"]
+
+        # Drop superseded checkpoints and their pending writes
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        for old_id in [i for i in checkpoints if i != checkpoint_id]:
+            del checkpoints[old_id]
+            self.writes.pop((thread_id, checkpoint_ns, old_id), None)
+
+        # Drop channel blobs replaced by the versions written in this put
+        latest = self._latest_versions.setdefault((thread_id, checkpoint_ns), {})
+        for channel, version in new_versions.items():
+            old_version = latest.get(channel)
+            if old_version is not None and old_version != version:
+                self.blobs.pop((thread_id, checkpoint_ns, channel, old_version), None)
+            latest[channel] = version
+
+        return next_config
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        for key in [k for k in self._latest_versions if k[0] == thread_id]:
+            del self._latest_versions[key]
@@ -1,7 +1,9 @@
 import os
+import asyncio
+import threading
 from typing import Any
 
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, BaseMessage
 
 
 def get_last_assistant_text(messages: list[BaseMessage]) -> str:
@@ -15,6 +17,63 @@ def get_last_assistant_text(messages: list[BaseMessage]) -> str:
     return "(no assistant message)"
 
 
+async def read_input(prompt: str) -> str:
+    """
+    Read a line from stdin without blocking the event loop.
+
+    input() runs in a daemon thread, so a pending read never keeps the
+    process alive on shutdown (unlike the default executor's threads).
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def worker() -> None:
+        try:
+            line = input(prompt)
+        except Exception as err:
+            loop.call_soon_threadsafe(future.set_exception, err)
+        else:
+            loop.call_soon_threadsafe(future.set_result, line)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return await future
+
+
+async def stream_answer(agent: Any, user_input: str, config: dict) -> None:
+    """Stream the agent's answer tokens to stdout as they are generated."""
+    print("\nBot> ", end="", flush=True)
+
+    streamed = False
+    streamed_id = None
+    stream = agent.astream(
+        {"messages": [HumanMessage(content=user_input)]},
+        config=config,
+        stream_mode="messages",
+    )
+
+    async for message, metadata in stream:
+        # Only the agent node's tokens are the answer (not the state extractor's)
+        if metadata.get("langgraph_node") != "agent" or not isinstance(message, AIMessageChunk):
+            continue
+
+        text = message.content if isinstance(message.content, str) else ""
+        if not text:
+            continue
+
+        if streamed and message.id != streamed_id:
+            print()
+        streamed = True
+        streamed_id = message.id
+        print(text, end="", flush=True)
+
+    # Nothing was streamed (e.g. the model returned no text deltas): print the final answer
+    if not streamed:
+        snapshot = await agent.aget_state(config)
+        print(get_last_assistant_text(snapshot.values.get("messages", [])), end="")
+
+    print()
+
+
 async def run_cli(agent: Any) -> None:
     """
     Run the interactive CLI chatbot.
@@ -29,8 +88,8 @@ async def run_cli(agent: Any) -> None:
 
     while True:
         try:
-            # Get user input
-            user_input = input("\nYou> ").strip()
+            # Get user input (in a worker thread so the event loop keeps running)
+            user_input = (await read_input("\nYou> ")).strip()
 
             if not user_input:
                 continue
@@ -38,16 +97,13 @@ async def run_cli(agent: Any) -> None:
             if user_input.lower() == "exit":
                 break
 
-            # Invoke the agent
-            state = await agent.ainvoke(
-                {"messages": [HumanMessage(content=user_input)]},
+            # Invoke the agent, printing the response as it streams
+            await stream_answer(
+                agent,
+                user_input,
                 config={"configurable": {"thread_id": thread_id}},
             )
 
-            # Get and print the response
-            answer = get_last_assistant_text(state["messages"])
-            print(f"\nBot> {answer}")
-
         except KeyboardInterrupt:
             print("\nGoodbye!")
             break
@@ -0,0 +1,53 @@
+import time
+import json
+import hashlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+# ----------------------------------------------------------------------
+# Constants
+# ----------------------------------------------------------------------
+
+LLM_CACHE_MAX_SIZE = 1024
+LLM_CACHE_TTL_SECONDS = 3600
+
+# ----------------------------------------------------------------------
+# TTL + LRU Cache
+# ----------------------------------------------------------------------
+
+
+class TTLCache:
+    """Process-local LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, maxsize: int = LLM_CACHE_MAX_SIZE, ttl: float = LLM_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries."""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+def make_cache_key(payload: Any) -> str:
+    """Build a stable sha256 key from a JSON-serializable payload."""
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -9,9 +9,12 @@ Usage:
     python -m src.main --cli    # Start CLI interface
 """
 
+import os
 import sys
 import asyncio
+import logging
 import signal
+from collections.abc import Callable
 from typing import Optional
 
 from dotenv import load_dotenv
@@ -22,6 +25,11 @@ from .cli import run_cli
 
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+
 
 def has_arg(name: str) -> bool:
     """Check if a command line argument exists."""
@@ -35,13 +43,14 @@ async def main() -> None:
     agent = handle.agent
     close = handle.close
 
-    # Setup graceful shutdown
+    # Setup graceful shutdown: cancel this task so the finally below closes
+    # the agent from the same task that opened it
     loop = asyncio.get_event_loop()
+    main_task = asyncio.current_task()
 
     def signal_handler():
         print("\nShutting down...")
-        asyncio.create_task(close())
-        loop.stop()
+        main_task.cancel()
 
     # Register signal handlers
     for sig in (signal.SIGINT, signal.SIGTERM):
@@ -51,19 +60,32 @@ async def main() -> None:
         if has_arg("--cli"):
             # Run CLI mode
             await run_cli(agent)
-            await close()
         else:
             # Run HTTP server mode (async)
             await start_server_async(agent)
+    except asyncio.CancelledError:
+        pass
     except Exception as err:
         print(f"Error: {err}")
-        await close()
         raise
+    finally:
+        await close()
+
+
+def get_event_loop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """Return uvloop's loop factory when available (installed with uvicorn[standard])."""
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return uvloop.new_event_loop
 
 
 def run() -> None:
     try:
-        asyncio.run(main())
+        # The server runs inside this loop, so this is where uvloop applies
+        with asyncio.Runner(loop_factory=get_event_loop_factory()) as runner:
+            runner.run(main())
     except KeyboardInterrupt:
         print("\nGoodbye!")
     except Exception as err:
@@ -1,19 +1,40 @@
 import os
-import json
-from typing import Any, AsyncGenerator
+import time
+import logging
+from typing import Any, AsyncGenerator, Optional
 
+import orjson
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from sse_starlette.sse import EventSourceResponse
 
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, BaseMessage
 
 import uvicorn
 
+logger = logging.getLogger(__name__)
+
+# Graph nodes whose updates carry messages, most frequent first
+KNOWN_MESSAGE_NODES = ("agent", "tools", "pre_extract", "trim")
+
+# Terminal SSE event, identical for every stream
+END_EVENT = {"event": "end", "data": "{}"}
+
+# Each "assistant" frame re-sends the message so far, so token frames are
+# coalesced to at most one per interval (plus one at message end)
+STREAM_FLUSH_INTERVAL_SECONDS = int(os.getenv("STREAM_FLUSH_INTERVAL_MS", "100")) / 1000
+
 # Utility Functions
 
 def content_to_string(content: Any) -> str:
+    # Fast path: streamed token content is almost always a plain str
+    if content.__class__ is str:
+        return content
+    return content_blocks_to_string(content)
+
+
+def content_blocks_to_string(content: Any) -> str:
     if isinstance(content, str):
         return content
     if isinstance(content, list):
@@ -23,13 +44,13 @@ def content_to_string(content: Any) -> str:
     return ""
 
 
-def extract_assistant_text_from_chunk(chunk: Any) -> str:
+def get_last_message_from_chunk(chunk: Any) -> Any:
     """
-    Extract the latest assistant text delta from a LangGraph stream chunk.
+    Get the last message from a LangGraph "updates" stream chunk, or None.
     Handles nested structure like {'agent': {'messages': [...]}}
     """
     if not chunk or not isinstance(chunk, dict):
-        return ""
+        return None
 
     # Handle nested structure: {'agent': {'messages': [...]}} or {'pre_extract': ...}
     msgs = None
@@ -38,16 +59,31 @@ def extract_assistant_text_from_chunk(chunk: Any) -> str:
     if "messages" in chunk:
         msgs = chunk["messages"]
     else:
-        # Try nested keys like 'agent', 'tools', etc.
-        for key, value in chunk.items():
-            if isinstance(value, dict) and "messages" in value:
+        # Try the graph's known node names by direct lookup; an update has
+        # one node key, so a known node without messages ends the search
+        for key in KNOWN_MESSAGE_NODES:
+            if key in chunk:
+                value = chunk[key]
+                if not isinstance(value, dict) or "messages" not in value:
+                    return None
                 msgs = value["messages"]
                 break
+        else:
+            # Fall back to scanning any other nested keys
+            for key, value in chunk.items():
+                if isinstance(value, dict) and "messages" in value:
+                    msgs = value["messages"]
+                    break
 
     if not isinstance(msgs, list) or len(msgs) == 0:
-        return ""
+        return None
+
+    return msgs[-1]
+
 
-    last = msgs[-1]
+def extract_assistant_text_from_chunk(chunk: Any) -> str:
+    """Extract the latest assistant text from a LangGraph "updates" stream chunk."""
+    last = get_last_message_from_chunk(chunk)
     if not last:
         return ""
 
@@ -66,6 +102,25 @@ def extract_assistant_text_from_chunk(chunk: Any) -> str:
     return ""
 
 
+def extract_agent_token_from_chunk(chunk: Any) -> tuple[Optional[str], str]:
+    """
+    Extract (message id, text delta) from a LangGraph "messages" stream item.
+    Only tokens generated by the agent node are returned, so the state
+    extractor's JSON output never reaches the client.
+    """
+    if not isinstance(chunk, tuple) or len(chunk) != 2:
+        return None, ""
+
+    message, metadata = chunk
+    if not isinstance(message, AIMessageChunk):
+        return None, ""
+
+    if not isinstance(metadata, dict) or metadata.get("langgraph_node") != "agent":
+        return None, ""
+
+    return message.id, content_to_string(message.content)
+
+
 # Request/Response Models
 
 class ChatRequest(BaseModel):
@@ -105,7 +160,9 @@ def create_app(agent: Any) -> FastAPI:
         """
         Chat endpoint with SSE streaming.
 
-        Streams assistant responses as Server-Sent Events.
+        Streams assistant responses as Server-Sent Events. Each "assistant"
+        event carries the full text of the current message so far, so tokens
+        reach the client as they are generated.
         """
         if not request.threadId:
             raise HTTPException(status_code=400, detail="threadId is required")
@@ -116,39 +173,80 @@ def create_app(agent: Any) -> FastAPI:
         async def event_generator() -> AsyncGenerator[dict, None]:
             """Generate SSE events from agent stream."""
             try:
-                print(f"[DEBUG] Starting stream for thread: {request.threadId}")
-                print(f"[DEBUG] Message: {request.message}")
+                logger.debug("Starting stream for thread: %s", request.threadId)
+                logger.debug("Message: %s", request.message)
 
                 stream = agent.astream(
                     {"messages": [HumanMessage(content=request.message)]},
                     config={"configurable": {"thread_id": request.threadId}},
+                    stream_mode=["messages", "updates"],
                 )
 
-                async for chunk in stream:
-                    print(f"[DEBUG] Chunk received: {type(chunk)} - {chunk}")
+                streaming_id: Optional[str] = None
+                streamed_text = ""
+                sent_length = 0
+                last_flush = 0.0
+                streamed_ids: set[str] = set()
+
+                def assistant_event(text: str) -> dict:
+                    return {
+                        "event": "assistant",
+                        "data": orjson.dumps({"message": text}).decode(),
+                    }
+
+                async for mode, chunk in stream:
+                    if mode == "messages":
+                        message_id, delta = extract_agent_token_from_chunk(chunk)
+                        if not delta:
+                            continue
+
+                        if message_id != streaming_id:
+                            if len(streamed_text) > sent_length:
+                                yield assistant_event(streamed_text)
+                            streaming_id = message_id
+                            streamed_text = ""
+                            sent_length = 0
+                            if message_id:
+                                streamed_ids.add(message_id)
+
+                        streamed_text += delta
+                        now = time.monotonic()
+                        if now - last_flush >= STREAM_FLUSH_INTERVAL_SECONDS:
+                            yield assistant_event(streamed_text)
+                            sent_length = len(streamed_text)
+                            last_flush = now
+                        continue
+
+                    # A node update ends that node's step: flush any held-back tokens
+                    if len(streamed_text) > sent_length:
+                        yield assistant_event(streamed_text)
+                        sent_length = len(streamed_text)
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Chunk received: %s - %s", type(chunk).__name__, chunk)
+
+                    # Messages already streamed token by token are not re-sent
+                    if getattr(get_last_message_from_chunk(chunk), "id", None) in streamed_ids:
+                        continue
+
                     assistant_text = extract_assistant_text_from_chunk(chunk)
 
                     if assistant_text:
-                        print(f"[DEBUG] Assistant text: {assistant_text}")
-                        yield {
-                            "event": "assistant",
-                            "data": json.dumps({"message": assistant_text}),
-                        }
+                        logger.debug("Assistant text: %s", assistant_text)
+                        yield assistant_event(assistant_text)
 
-                print("[DEBUG] Stream completed")
-                yield {
-                    "event": "end",
-                    "data": "{}",
-                }
+                if len(streamed_text) > sent_length:
+                    yield assistant_event(streamed_text)
+
+                logger.debug("Stream completed for thread: %s", request.threadId)
+                yield END_EVENT
 
             except Exception as err:
-                import traceback
-                print(f"[ERROR] Exception: {err}")
-                print(f"[ERROR] Traceback: {traceback.format_exc()}")
+                logger.exception("Chat stream failed for thread %s", request.threadId)
                 msg = str(err)
                 yield {
                     "event": "error",
-                    "data": json.dumps({"error": msg}),
+                    "data": orjson.dumps({"error": msg}).decode(),
                 }
 
         return EventSourceResponse(event_generator())
@@ -162,7 +260,7 @@ async def start_server_async(agent: Any) -> None:
     app = create_app(agent)
     port = int(os.getenv("PORT", "3000"))
 
-    print(f"SSE chatbot running at http://localhost:{port}")
+    logger.info("SSE chatbot running at http://localhost:%s", port)
 
     config = uvicorn.Config(app, host="0.0.0.0", port=port, log_level="info")
     server = uvicorn.Server(config)
@@ -181,6 +279,6 @@ def start_server(agent: Any) -> None:
     app = create_app(agent)
     port = int(os.getenv("PORT", "3000"))
 
-    print(f"SSE chatbot running at http://localhost:{port}")
+    logger.info("SSE chatbot running at http://localhost:%s", port)
 
     uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
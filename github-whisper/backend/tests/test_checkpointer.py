@@ -0,0 +1,81 @@
+from typing import Annotated, Optional, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, ToolMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from src.agent import get_trimmed_message_ids
+from src.checkpointer import LatestCheckpointMemorySaver
+
+MAX_MESSAGES = 8
+
+
+class State(TypedDict):
+    messages: Annotated[list[BaseMessage], add_messages]
+    activeOrg: Optional[str]
+
+
+def build_graph(checkpointer):
+    """Same shape as the agent: trim -> pre_extract -> agent <-> tools."""
+
+    def trim(state: State) -> dict:
+        ids = get_trimmed_message_ids(state["messages"], MAX_MESSAGES)
+        return {"messages": [RemoveMessage(id=i) for i in ids]} if ids else {}
+
+    def pre_extract(state: State) -> dict:
+        text = state["messages"][-1].content
+        return {"activeOrg": text.split()[-1]} if text.startswith("use org") else {}
+
+    def agent(state: State) -> dict:
+        last = state["messages"][-1]
+        if isinstance(last, HumanMessage):
+            call = {"name": "search", "args": {}, "id": f"call-{len(state['messages'])}"}
+            return {"messages": [AIMessage(content="", tool_calls=[call])]}
+        return {"messages": [AIMessage(content="done")]}
+
+    def tools(state: State) -> dict:
+        call = state["messages"][-1].tool_calls[0]
+        return {"messages": [ToolMessage(content="result", tool_call_id=call["id"])]}
+
+    def route(state: State) -> str:
+        return "tools" if state["messages"][-1].tool_calls else END
+
+    workflow = StateGraph(State)
+    workflow.add_node("trim", trim)
+    workflow.add_node("pre_extract", pre_extract)
+    workflow.add_node("agent", agent)
+    workflow.add_node("tools", tools)
+    workflow.add_edge(START, "trim")
+    workflow.add_edge("trim", "pre_extract")
+    workflow.add_edge("pre_extract", "agent")
+    workflow.add_conditional_edges("agent", route, ["tools", END])
+    workflow.add_edge("tools", "agent")
+    return workflow.compile(checkpointer=checkpointer)
+
+
+async def test_keeps_only_the_latest_checkpoint_per_thread():
+    saver = LatestCheckpointMemorySaver()
+    graph = build_graph(saver)
+    configs = [{"configurable": {"thread_id": t}} for t in ("a", "b")]
+
+    blob_counts = []
+    for turn in range(10):
+        for config in configs:
+            text = "use org acme" if turn == 0 else f"question {turn}"
+            await graph.ainvoke({"messages": [HumanMessage(content=text)]}, config)
+            assert len(list(saver.list(config))) == 1
+        blob_counts.append(len(saver.blobs))
+
+    # Superseded channel blobs are dropped, so the count stops growing
+    assert len(set(blob_counts[1:])) == 1
+
+    for config in configs:
+        snapshot = await graph.aget_state(config)
+        messages = snapshot.values["messages"]
+
+        # The org set on the first turn survives both pruning and trimming
+        assert snapshot.values["activeOrg"] == "acme"
+        assert len(messages) <= MAX_MESSAGES + 4
+        assert isinstance(messages[0], HumanMessage)
+        assert messages[-4].content == "question 9"
+        assert messages[-1].content == "done"
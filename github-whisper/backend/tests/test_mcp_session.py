@@ -0,0 +1,125 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import anyio
+import pytest
+from langchain_core.tools import ToolException
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS, ErrorData
+
+import src.agent as agent_module
+from src.agent import MCPToolSession
+
+
+class FakeSession:
+    def __init__(self, tool_names, errors):
+        self.tool_names = tool_names
+        self.errors = list(errors)
+        self.closed = False
+
+
+class FakeTool:
+    def __init__(self, name, session):
+        self.name = name
+        self.session = session
+
+    def invoke(self, args):
+        raise NotImplementedError
+
+    async def ainvoke(self, args):
+        if self.session.closed:
+            raise anyio.ClosedResourceError()
+        if self.session.errors:
+            raise self.session.errors.pop(0)
+        return f"{self.name}:{args['q']}"
+
+
+class FakeClient:
+    """Opens one FakeSession per spec, in order, for each session() call."""
+
+    def __init__(self, *specs):
+        self.specs = list(specs)
+        self.sessions = []
+
+    @asynccontextmanager
+    async def session(self, server_name):
+        tool_names, errors = self.specs.pop(0)
+        session = FakeSession(tool_names, errors)
+        self.sessions.append(session)
+        try:
+            yield session
+        finally:
+            session.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_load_mcp_tools(monkeypatch):
+    async def load_mcp_tools(session):
+        return [FakeTool(name, session) for name in session.tool_names]
+
+    monkeypatch.setattr(agent_module, "load_mcp_tools", load_mcp_tools)
+
+
+def invalid_params():
+    return McpError(ErrorData(code=INVALID_PARAMS, message="invalid params"))
+
+
+async def test_error_replies_do_not_reconnect():
+    client = FakeClient((["search"], [invalid_params() for _ in range(3)]))
+    mcp_session = MCPToolSession(client, "github")
+    await mcp_session.connect()
+
+    for _ in range(3):
+        with pytest.raises(McpError):
+            await mcp_session.ainvoke("search", {"q": "x"})
+
+    assert len(client.sessions) == 1
+    assert await mcp_session.ainvoke("search", {"q": "ok"}) == "search:ok"
+    await mcp_session.aclose()
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        anyio.ClosedResourceError(),
+        McpError(ErrorData(code=32600, message="Session terminated")),
+    ],
+)
+async def test_lost_session_reconnects_and_retries(error):
+    client = FakeClient((["search"], [error]), (["search"], []))
+    mcp_session = MCPToolSession(client, "github")
+    await mcp_session.connect()
+
+    assert await mcp_session.ainvoke("search", {"q": "x"}) == "search:x"
+
+    assert len(client.sessions) == 2
+    assert client.sessions[0].closed
+    await mcp_session.aclose()
+    assert client.sessions[1].closed
+
+
+async def test_concurrent_failures_reconnect_once():
+    lost = [anyio.BrokenResourceError() for _ in range(3)]
+    client = FakeClient((["search"], lost), (["search"], []))
+    mcp_session = MCPToolSession(client, "github")
+    await mcp_session.connect()
+
+    results = await asyncio.gather(
+        *(mcp_session.ainvoke("search", {"q": str(i)}) for i in range(3))
+    )
+
+    assert results == ["search:0", "search:1", "search:2"]
+    assert len(client.sessions) == 2
+    await mcp_session.aclose()
+
+
+async def test_tool_missing_after_reconnect():
+    client = FakeClient((["search"], [anyio.ClosedResourceError()]), (["other"], []))
+    mcp_session = MCPToolSession(client, "github")
+    await mcp_session.connect()
+
+    with pytest.raises(ToolException, match="search"):
+        await mcp_session.ainvoke("search", {"q": "x"})
+
+    assert not mcp_session.has_tool("search")
+    await mcp_session.aclose()
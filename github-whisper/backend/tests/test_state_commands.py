@@ -0,0 +1,75 @@
+import pytest
+
+from src.agent import fast_parse_state_command, has_state_hint
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("use org acme", {"activeOrg": "acme"}),
+        ("Switch to the organization my-company.", {"activeOrg": "my-company"}),
+        ("use repo facebook/react", {"activeRepo": "facebook/react"}),
+        ("Repository is foo/bar", {"activeRepo": "foo/bar"}),
+        ("repo is https://github.com/foo/bar.git", {"activeRepo": "foo/bar"}),
+        ("switch to repo my-org/my-repo!", {"activeRepo": "my-org/my-repo"}),
+        ("Use branch main", {"activeBranch": "main"}),
+        ("switch to the branch feature/login", {"activeBranch": "feature/login"}),
+        ("clear org", {"activeOrg": None}),
+        ("Clear the repository.", {"activeRepo": None}),
+        ("clear branch", {"activeBranch": None}),
+    ],
+)
+def test_parses_explicit_commands(text, expected):
+    assert fast_parse_state_command(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "branch protection",
+        "branch list",
+        "Branch is broken",
+        "branch is",
+        "branch develop",
+        "Organization is growing",
+        "my org is acme",
+        "repo is broken",
+        "use facebook/react",
+        "Switch to feature/login",
+        "clear",
+        "what is the default branch?",
+        "",
+    ],
+)
+def test_leaves_other_messages_to_the_extractor(text):
+    assert fast_parse_state_command(text) is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "use facebook/react",
+        "Use acme/widgets",
+        "Switch to feature/login",
+        "clear everything",
+        "which branch is deployed?",
+        "My org is acme",
+        "facebook/react",
+        "https://github.com/facebook/react",
+        "it is acme/widgets",
+    ],
+)
+def test_state_hint_found(text):
+    assert has_state_hint(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "who is the user with most commits?",
+        "explain this because I am lost",
+        "hello there",
+    ],
+)
+def test_state_hint_not_found(text):
+    assert not has_state_hint(text)
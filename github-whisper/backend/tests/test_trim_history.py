@@ -0,0 +1,71 @@
+import itertools
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.agent import get_trimmed_message_ids
+
+ids = itertools.count()
+
+
+def human(text="q"):
+    return HumanMessage(content=text, id=f"m{next(ids)}")
+
+
+def tool_turn(tool_calls=2):
+    """One turn: question, tool-calling answer, its tool results, final answer."""
+    calls = [{"name": "search", "args": {}, "id": f"c{next(ids)}"} for _ in range(tool_calls)]
+    return [
+        human(),
+        AIMessage(content="", tool_calls=calls, id=f"m{next(ids)}"),
+        *(ToolMessage(content="r", tool_call_id=c["id"], id=f"m{next(ids)}") for c in calls),
+        AIMessage(content="done", id=f"m{next(ids)}"),
+    ]
+
+
+def keep(messages, max_messages):
+    dropped = set(get_trimmed_message_ids(messages, max_messages))
+    return [m for m in messages if m.id not in dropped]
+
+
+@pytest.mark.parametrize("max_messages", [0, -1])
+def test_disabled(max_messages):
+    messages = [m for _ in range(10) for m in tool_turn()]
+    assert get_trimmed_message_ids(messages, max_messages) == []
+
+
+def test_within_limit():
+    messages = tool_turn()
+    assert get_trimmed_message_ids(messages, len(messages)) == []
+
+
+def test_single_long_turn_is_kept():
+    # The only HumanMessage is at index 0, so there is nothing to drop
+    messages = tool_turn(tool_calls=20)
+    assert get_trimmed_message_ids(messages, 8) == []
+
+
+def test_falls_back_to_the_last_turn():
+    # No turn starts inside the window, so the last turn is kept whole
+    messages = tool_turn(1) + tool_turn(20)
+    kept = keep(messages, 8)
+    assert kept == messages[4:]
+
+
+def test_trims_in_one_batch_to_half():
+    messages = [m for _ in range(6) for m in tool_turn(1)]
+    kept = keep(messages, 20)
+    assert len(kept) <= 10
+    assert isinstance(kept[0], HumanMessage)
+    assert kept[-1] is messages[-1]
+
+
+@pytest.mark.parametrize("max_messages", range(2, 30))
+def test_never_splits_tool_calls_from_results(max_messages):
+    messages = [m for n in (1, 3, 2, 1, 4, 2) for m in tool_turn(n)]
+    kept = keep(messages, max_messages)
+
+    assert isinstance(kept[0], HumanMessage)
+    call_ids = {c["id"] for m in kept if isinstance(m, AIMessage) for c in m.tool_calls}
+    result_ids = {m.tool_call_id for m in kept if isinstance(m, ToolMessage)}
+    assert call_ids == result_ids